@@ -1,12 +1,13 @@
 use crate::{
-    bitcoin::{BitcoinInterface, BlockChainTip, UTxO},
+    bitcoin::{poller::PollNotifier, BitcoinInterface, BlockChainTip, UTxO},
     database::{Coin, CoinType, DatabaseConnection, DatabaseInterface},
     descriptors,
 };
 
 use std::{
+    cmp,
     sync::{self, atomic},
-    thread, time,
+    time,
 };
 
 use miniscript::bitcoin::{self, secp256k1};
@@ -290,13 +291,15 @@ fn maybe_initialize_tip(bit: &impl BitcoinInterface, db: &impl DatabaseInterface
 }
 
 /// Main event loop. Repeatedly polls the Bitcoin interface until told to stop through the
-/// `shutdown` atomic.
+/// `shutdown` atomic. Signals the completion of each update cycle through the `notifier`, which
+/// may also be used to request an update cycle before the end of the poll interval.
 pub fn looper(
     bit: sync::Arc<sync::Mutex<dyn BitcoinInterface>>,
     db: sync::Arc<sync::Mutex<dyn DatabaseInterface>>,
     shutdown: sync::Arc<atomic::AtomicBool>,
     poll_interval: time::Duration,
     desc: descriptors::MultipathDescriptor,
+    notifier: sync::Arc<PollNotifier>,
 ) {
     let mut last_poll = None;
     let mut synced = false;
@@ -312,8 +315,15 @@ pub fn looper(
         let now = time::Instant::now();
 
         if let Some(last_poll) = last_poll {
-            if now.duration_since(last_poll) < poll_interval {
-                thread::sleep(time::Duration::from_millis(500));
+            let elapsed = now.duration_since(last_poll);
+            let poll_requested = notifier.take_poll_request();
+            if elapsed < poll_interval && !poll_requested {
+                // Don't sleep for too long in order to check for shutdown regularly, and wake up
+                // early if someone is waiting on us to poll.
+                notifier.wait_poll_request(cmp::min(
+                    poll_interval - elapsed,
+                    time::Duration::from_millis(500),
+                ));
                 continue;
             }
         }
@@ -331,12 +341,13 @@ pub fn looper(
                 // Avoid harassing bitcoind..
                 // TODO: be smarter, like in revaultd, but more generic too.
                 #[cfg(not(test))]
-                thread::sleep(time::Duration::from_secs(30));
+                std::thread::sleep(time::Duration::from_secs(30));
                 continue;
             }
         }
 
         updates(&bit, &db, &descs, &secp);
         rescan_check(&bit, &db, &descs, &secp);
+        notifier.notify();
     }
 }
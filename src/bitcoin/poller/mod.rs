@@ -11,6 +11,72 @@ use std::{
     thread, time,
 };
 
+#[derive(Debug, Default)]
+struct PollState {
+    // The number of update cycles completed so far.
+    cycles: u64,
+    // Whether an update cycle was requested to happen before the end of the poll interval.
+    poll_requested: bool,
+}
+
+/// Notifies of the completion of the poller's update cycles, and lets callers request an update
+/// cycle to happen without waiting for the end of the poll interval.
+#[derive(Debug, Default)]
+pub struct PollNotifier {
+    state: sync::Mutex<PollState>,
+    cond: sync::Condvar,
+}
+
+impl PollNotifier {
+    /// Get the number of update cycles completed so far.
+    pub fn cycles(&self) -> u64 {
+        self.state.lock().unwrap().cycles
+    }
+
+    /// Signal the completion of an update cycle to all the waiters.
+    pub fn notify(&self) {
+        self.state.lock().unwrap().cycles += 1;
+        self.cond.notify_all();
+    }
+
+    /// Wait until more than `cycles` update cycles were completed, or until the timeout expires
+    /// if one is given.
+    pub fn wait_after(&self, cycles: u64, timeout: Option<time::Duration>) {
+        let guard = self.state.lock().unwrap();
+        if let Some(timeout) = timeout {
+            let _ = self
+                .cond
+                .wait_timeout_while(guard, timeout, |s| s.cycles <= cycles)
+                .unwrap();
+        } else {
+            let _guard = self.cond.wait_while(guard, |s| s.cycles <= cycles).unwrap();
+        }
+    }
+
+    /// Ask the poller to start an update cycle as soon as possible.
+    pub fn request_poll(&self) {
+        self.state.lock().unwrap().poll_requested = true;
+        self.cond.notify_all();
+    }
+
+    /// Whether an update cycle was requested. Resets the request.
+    fn take_poll_request(&self) -> bool {
+        let mut state = self.state.lock().unwrap();
+        let requested = state.poll_requested;
+        state.poll_requested = false;
+        requested
+    }
+
+    /// Wait until an update cycle is requested, or until the timeout expires.
+    fn wait_poll_request(&self, timeout: time::Duration) {
+        let guard = self.state.lock().unwrap();
+        let _ = self
+            .cond
+            .wait_timeout_while(guard, timeout, |s| !s.poll_requested)
+            .unwrap();
+    }
+}
+
 /// The Bitcoin poller handler.
 pub struct Poller {
     handle: thread::JoinHandle<()>,
@@ -23,13 +89,14 @@ impl Poller {
         db: sync::Arc<sync::Mutex<dyn DatabaseInterface>>,
         poll_interval: time::Duration,
         desc: descriptors::MultipathDescriptor,
+        notifier: sync::Arc<PollNotifier>,
     ) -> Poller {
         let shutdown = sync::Arc::from(atomic::AtomicBool::from(false));
         let handle = thread::Builder::new()
             .name("Bitcoin poller".to_string())
             .spawn({
                 let shutdown = shutdown.clone();
-                move || looper(bit, db, shutdown, poll_interval, desc)
+                move || looper(bit, db, shutdown, poll_interval, desc, notifier)
             })
             .expect("Must not fail");
 
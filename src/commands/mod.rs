@@ -15,13 +15,16 @@ use utils::{deser_amount_from_sats, deser_base64, deser_hex, ser_amount, ser_bas
 use std::{
     collections::{hash_map, BTreeMap, HashMap},
     convert::TryInto,
-    fmt,
+    fmt, time,
 };
 
 use miniscript::{
     bitcoin::{
         self,
-        util::psbt::{Input as PsbtIn, Output as PsbtOut, PartiallySignedTransaction as Psbt},
+        util::{
+            bip32,
+            psbt::{Input as PsbtIn, Output as PsbtOut, PartiallySignedTransaction as Psbt},
+        },
     },
     psbt::PsbtExt,
 };
@@ -195,6 +198,49 @@ impl DaemonControl {
         desc.derive(coin.derivation_index, &self.secp)
     }
 
+    // Query our state with `query` until `is_done` holds for the result, re-checking it after
+    // each update cycle of the poller. Gives up once the timeout expires, if one is given.
+    // Returns the last result of the query.
+    //
+    // The caller is likely waiting for an event that already happened on the Bitcoin backend, so
+    // request the poller to update our state right away instead of waiting for the end of its
+    // poll interval. We only do so once, as to not harass bitcoind during long waits.
+    fn wait_for_update<T>(
+        &self,
+        timeout: Option<time::Duration>,
+        query: impl Fn() -> T,
+        is_done: impl Fn(&T) -> bool,
+    ) -> T {
+        let deadline = timeout.map(|t| time::Instant::now() + t);
+        let mut poll_requested = false;
+
+        loop {
+            // Query the number of completed poller cycles before querying our state, so we don't
+            // miss one that would complete in between.
+            let cycles = self.poll_notifier.cycles();
+            let res = query();
+            if is_done(&res) {
+                return res;
+            }
+
+            let remaining = match deadline {
+                Some(deadline) => {
+                    let now = time::Instant::now();
+                    if now >= deadline {
+                        return res;
+                    }
+                    Some(deadline - now)
+                }
+                None => None,
+            };
+            if !poll_requested {
+                self.poll_notifier.request_poll();
+                poll_requested = true;
+            }
+            self.poll_notifier.wait_after(cycles, remaining);
+        }
+    }
+
     // Check whether this address is valid for the network we are operating on.
     fn validate_address(&self, addr: &bitcoin::Address) -> Result<(), CommandError> {
         // NOTE: signet uses testnet addresses
@@ -233,6 +279,38 @@ impl DaemonControl {
         }
     }
 
+    /// Wait until we are synced at (or beyond) the given block height, or until the timeout
+    /// expires if one is given. Returns the block height we are synced at.
+    pub fn wait_for_block_height(
+        &self,
+        height: i32,
+        timeout: Option<time::Duration>,
+    ) -> WaitForBlockHeightResult {
+        self.wait_for_update(
+            timeout,
+            || {
+                let block_height = self
+                    .db
+                    .connection()
+                    .chain_tip()
+                    .map(|tip| tip.height)
+                    .unwrap_or(0);
+                WaitForBlockHeightResult { block_height }
+            },
+            |res| res.block_height >= height,
+        )
+    }
+
+    /// Wait until we know of at least the given number of coins, or until the timeout expires if
+    /// one is given. Returns all our coins, like `list_coins`.
+    pub fn wait_for_coins(&self, count: usize, timeout: Option<time::Duration>) -> ListCoinsResult {
+        self.wait_for_update(
+            timeout,
+            || self.list_coins(),
+            |res| res.coins.len() >= count,
+        )
+    }
+
     /// Get a new deposit address. This will always generate a new deposit address, regardless of
     /// whether it was actually used.
     pub fn get_new_address(&self) -> GetAddressResult {
@@ -251,6 +329,30 @@ impl DaemonControl {
         GetAddressResult { address }
     }
 
+    /// Get `count` new addresses for receiving coins at once. Like `get_new_address`, this will
+    /// always generate new addresses. The derivation index is only bumped once for all of them.
+    pub fn get_new_addresses(&self, count: u32) -> GetAddressesResult {
+        let mut db_conn = self.db.connection();
+        let index: u32 = db_conn.receive_index().into();
+        let new_index = index
+            .checked_add(count)
+            .and_then(|i| bip32::ChildNumber::from_normal_idx(i).ok())
+            .expect("Can't get into hardened territory");
+        if count > 0 {
+            db_conn.set_receive_index(new_index, &self.secp);
+        }
+
+        let receive_desc = self.config.main_descriptor.receive_descriptor();
+        let addresses = (index..index + count)
+            .map(|i| {
+                receive_desc
+                    .derive(i.into(), &self.secp)
+                    .address(self.config.bitcoin_config.network)
+            })
+            .collect();
+        GetAddressesResult { addresses }
+    }
+
     /// Get a list of all known coins.
     pub fn list_coins(&self) -> ListCoinsResult {
         let mut db_conn = self.db.connection();
@@ -765,11 +867,21 @@ pub struct GetInfoResult {
     pub rescan_progress: Option<f64>,
 }
 
+#[derive(Debug, Clone, Copy, Serialize, Deserialize)]
+pub struct WaitForBlockHeightResult {
+    pub block_height: i32,
+}
+
 #[derive(Debug, Clone, Serialize, Deserialize)]
 pub struct GetAddressResult {
     pub address: bitcoin::Address,
 }
 
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct GetAddressesResult {
+    pub addresses: Vec<bitcoin::Address>,
+}
+
 #[derive(Debug, Clone, Copy, Serialize, Deserialize)]
 pub struct LCSpendInfo {
     pub txid: bitcoin::Txid,
@@ -853,6 +965,38 @@ mod tests {
         ms.shutdown();
     }
 
+    #[test]
+    fn waitforblockheight() {
+        let ms = DummyLiana::new(DummyBitcoind::new(), DummyDatabase::new());
+        let control = &ms.handle.control;
+
+        // The dummy Bitcoin backend is at height 100. We'll return once we've synced up to it.
+        let res = control.wait_for_block_height(100, None);
+        assert_eq!(res.block_height, 100);
+
+        // But we'll time out waiting for a block that will never come.
+        let res = control.wait_for_block_height(101, Some(time::Duration::from_millis(100)));
+        assert_eq!(res.block_height, 100);
+
+        ms.shutdown();
+    }
+
+    #[test]
+    fn waitforcoins() {
+        let ms = DummyLiana::new(DummyBitcoind::new(), DummyDatabase::new());
+        let control = &ms.handle.control;
+
+        // We don't have any coin, but that's all we are asking for.
+        let res = control.wait_for_coins(0, None);
+        assert!(res.coins.is_empty());
+
+        // We'll time out waiting for a coin that will never come.
+        let res = control.wait_for_coins(1, Some(time::Duration::from_millis(100)));
+        assert!(res.coins.is_empty());
+
+        ms.shutdown();
+    }
+
     #[test]
     fn getnewaddress() {
         let ms = DummyLiana::new(DummyBitcoind::new(), DummyDatabase::new());
@@ -874,6 +1018,32 @@ mod tests {
         ms.shutdown();
     }
 
+    #[test]
+    fn getnewaddresses() {
+        let ms = DummyLiana::new(DummyBitcoind::new(), DummyDatabase::new());
+        let control = &ms.handle.control;
+
+        // We get the addresses getnewaddress would have given us, in order.
+        let addrs = control.get_new_addresses(3).addresses;
+        assert_eq!(addrs.len(), 3);
+        assert_eq!(
+            addrs[0],
+            bitcoin::Address::from_str(
+                "bc1q9ksrc647hx8zp2cewl8p5f487dgux3777yees8rjcx46t4daqzzqt7yga8"
+            )
+            .unwrap()
+        );
+        assert!(addrs[0] != addrs[1] && addrs[1] != addrs[2] && addrs[0] != addrs[2]);
+
+        // And won't get any of them again.
+        let addr = control.get_new_address().address;
+        assert!(!addrs.contains(&addr));
+        assert!(control.get_new_addresses(0).addresses.is_empty());
+        assert!(!control.get_new_addresses(2).addresses.contains(&addr));
+
+        ms.shutdown();
+    }
+
     #[test]
     fn create_spend() {
         let dummy_op = bitcoin::OutPoint::from_str(
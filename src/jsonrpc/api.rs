@@ -3,10 +3,13 @@ use crate::{
     DaemonControl,
 };
 
-use std::{collections::HashMap, convert::TryInto, str::FromStr};
+use std::{collections::HashMap, convert::TryInto, str::FromStr, time};
 
 use miniscript::bitcoin::{self, consensus, util::psbt::PartiallySignedTransaction as Psbt};
 
+// The maximum number of addresses that can be requested at once through 'getnewaddresses'.
+const MAX_NEW_ADDRESSES: u32 = 1_000;
+
 fn create_spend(control: &DaemonControl, params: Params) -> Result<serde_json::Value, Error> {
     let destinations = params
         .get(0, "destinations")
@@ -153,6 +156,64 @@ fn create_recovery(control: &DaemonControl, params: Params) -> Result<serde_json
     Ok(serde_json::json!(&res))
 }
 
+fn get_new_addresses(control: &DaemonControl, params: Params) -> Result<serde_json::Value, Error> {
+    let count: u32 = params
+        .get(0, "count")
+        .ok_or_else(|| Error::invalid_params("Missing 'count' parameter."))?
+        .as_u64()
+        .and_then(|c| c.try_into().ok())
+        .filter(|c| *c <= MAX_NEW_ADDRESSES)
+        .ok_or_else(|| Error::invalid_params("Invalid 'count' parameter."))?;
+
+    Ok(serde_json::json!(&control.get_new_addresses(count)))
+}
+
+// Get the optional timeout parameter of the 'waitfor*' commands, in milliseconds. Like bitcoind,
+// a timeout of 0 (or none) means we'll wait forever.
+fn timeout_param(params: &Params, index: usize) -> Result<Option<time::Duration>, Error> {
+    let timeout = match params.get(index, "timeout") {
+        Some(timeout) => timeout
+            .as_u64()
+            .ok_or_else(|| Error::invalid_params("Invalid 'timeout' parameter."))?,
+        None => 0,
+    };
+
+    Ok(if timeout > 0 {
+        Some(time::Duration::from_millis(timeout))
+    } else {
+        None
+    })
+}
+
+fn wait_for_block_height(
+    control: &DaemonControl,
+    params: Params,
+) -> Result<serde_json::Value, Error> {
+    let height: i32 = params
+        .get(0, "height")
+        .ok_or_else(|| Error::invalid_params("Missing 'height' parameter."))?
+        .as_i64()
+        .and_then(|h| h.try_into().ok())
+        .ok_or_else(|| Error::invalid_params("Invalid 'height' parameter."))?;
+    let timeout = timeout_param(&params, 1)?;
+
+    Ok(serde_json::json!(
+        &control.wait_for_block_height(height, timeout)
+    ))
+}
+
+fn wait_for_coins(control: &DaemonControl, params: Params) -> Result<serde_json::Value, Error> {
+    let count: usize = params
+        .get(0, "count")
+        .ok_or_else(|| Error::invalid_params("Missing 'count' parameter."))?
+        .as_u64()
+        .and_then(|c| c.try_into().ok())
+        .ok_or_else(|| Error::invalid_params("Invalid 'count' parameter."))?;
+    let timeout = timeout_param(&params, 1)?;
+
+    Ok(serde_json::json!(&control.wait_for_coins(count, timeout)))
+}
+
 /// Handle an incoming JSONRPC2 request.
 pub fn handle_request(control: &DaemonControl, req: Request) -> Result<Response, Error> {
     let result = match req.method.as_str() {
@@ -184,6 +245,12 @@ pub fn handle_request(control: &DaemonControl, req: Request) -> Result<Response,
         }
         "getinfo" => serde_json::json!(&control.get_info()),
         "getnewaddress" => serde_json::json!(&control.get_new_address()),
+        "getnewaddresses" => {
+            let params = req
+                .params
+                .ok_or_else(|| Error::invalid_params("Missing 'count' parameter."))?;
+            get_new_addresses(control, params)?
+        }
         "listcoins" => serde_json::json!(&control.list_coins()),
         "listconfirmed" => {
             let params = req.params.ok_or_else(|| {
@@ -215,6 +282,18 @@ pub fn handle_request(control: &DaemonControl, req: Request) -> Result<Response,
                 .ok_or_else(|| Error::invalid_params("Missing 'psbt' parameter."))?;
             update_spend(control, params)?
         }
+        "waitforblockheight" => {
+            let params = req
+                .params
+                .ok_or_else(|| Error::invalid_params("Missing 'height' parameter."))?;
+            wait_for_block_height(control, params)?
+        }
+        "waitforcoins" => {
+            let params = req
+                .params
+                .ok_or_else(|| Error::invalid_params("Missing 'count' parameter."))?;
+            wait_for_coins(control, params)?
+        }
         _ => {
             return Err(Error::method_not_found());
         }
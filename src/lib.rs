@@ -224,6 +224,7 @@ pub struct DaemonControl {
     // FIXME: Should we require Sync on DatabaseInterface rather than using a Mutex?
     db: sync::Arc<sync::Mutex<dyn DatabaseInterface>>,
     secp: secp256k1::Secp256k1<secp256k1::VerifyOnly>,
+    poll_notifier: sync::Arc<poller::PollNotifier>,
 }
 
 impl DaemonControl {
@@ -232,12 +233,14 @@ impl DaemonControl {
         bitcoin: sync::Arc<sync::Mutex<dyn BitcoinInterface>>,
         db: sync::Arc<sync::Mutex<dyn DatabaseInterface>>,
         secp: secp256k1::Secp256k1<secp256k1::VerifyOnly>,
+        poll_notifier: sync::Arc<poller::PollNotifier>,
     ) -> DaemonControl {
         DaemonControl {
             config,
             bitcoin,
             db,
             secp,
+            poll_notifier,
         }
     }
 
@@ -320,15 +323,18 @@ impl DaemonHandle {
         }
 
         // Spawn the bitcoind poller with a retry limit high enough that we'd fail after that.
+        // The API gets notified of each of its update cycles.
+        let poll_notifier = sync::Arc::new(poller::PollNotifier::default());
         let bitcoin_poller = poller::Poller::start(
             bit.clone(),
             db.clone(),
             config.bitcoin_config.poll_interval_secs,
             config.main_descriptor.clone(),
+            poll_notifier.clone(),
         );
 
         // Finally, set up the API.
-        let control = DaemonControl::new(config, bit, db, secp);
+        let control = DaemonControl::new(config, bit, db, secp, poll_notifier);
 
         Ok(Self {
             control,
@@ -96,8 +96,8 @@ def executor(test_name):
     ex.shutdown(wait=False)
 
 
-@pytest.fixture
-def bitcoind(directory):
+def start_bitcoind(directory):
+    """Start a bitcoind in this directory, with a funded wallet."""
     bitcoind = Bitcoind(bitcoin_dir=os.path.join(directory, "bitcoind"))
     bitcoind.startup()
 
@@ -107,11 +107,42 @@ def bitcoind(directory):
     while bitcoind.rpc.getbalance() < 50:
         time.sleep(0.01)
 
+    return bitcoind
+
+
+@pytest.fixture
+def bitcoind(directory):
+    bitcoind = start_bitcoind(directory)
+
     yield bitcoind
 
     bitcoind.cleanup()
 
 
+@pytest.fixture(scope="module")
+def module_bitcoind(request, test_base_dir):
+    """A bitcoind shared among all the tests of a module.
+
+    This saves starting a new bitcoind for each test. The tests using it must not rely
+    on a fresh block chain. They still each get their own lianad, and therefore their
+    own watchonly wallet.
+    """
+    directory = tempfile.mkdtemp(
+        prefix=f"{request.module.__name__}_", dir=test_base_dir
+    )
+    bitcoind = start_bitcoind(directory)
+    # Tell the lianad fixture to clean up after itself on this bitcoind.
+    bitcoind.is_shared = True
+
+    yield bitcoind
+
+    bitcoind.cleanup()
+    if request.session.testsfailed == 0:
+        shutil.rmtree(directory)
+    else:
+        print(f"Test failed, leaving directory '{directory}' intact")
+
+
 @pytest.fixture
 def lianad(bitcoind, directory):
     datadir = os.path.join(directory, "lianad")
@@ -143,3 +174,9 @@ def lianad(bitcoind, directory):
         raise
 
     lianad.cleanup()
+
+    # A shared bitcoind outlives us, don't leave it with a wallet we are about to delete.
+    if getattr(bitcoind, "is_shared", False):
+        wallet_path = os.path.join(datadir, "regtest", "lianad_watchonly_wallet")
+        if wallet_path in bitcoind.node_rpc.listwallets():
+            bitcoind.node_rpc.unloadwallet(wallet_path)
@@ -1,7 +1,7 @@
 import time
 
 from fixtures import *
-from test_framework.utils import wait_for, get_txid, spend_coins
+from test_framework.utils import wait_for, wait_for_coins, get_txid, spend_coins
 
 
 def get_coin(lianad, outpoint_or_txid):
@@ -55,14 +55,14 @@ def test_reorg_exclusion(lianad, bitcoind):
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 1)
     bitcoind.generate_block(1, wait_for_mempool=txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
+    wait_for_coins(lianad, 1)
     coin_a = lianad.rpc.listcoins()["coins"][0]
 
     # A confirmed and 'spending' (unconfirmed spend) coin
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 2)
     bitcoind.generate_block(1, wait_for_mempool=txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 2)
+    wait_for_coins(lianad, 2)
     coin_b = get_coin(lianad, txid)
     b_spend_tx = spend_coins(lianad, bitcoind, [coin_b])
 
@@ -70,7 +70,7 @@ def test_reorg_exclusion(lianad, bitcoind):
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 3)
     bitcoind.generate_block(1, wait_for_mempool=txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 3)
+    wait_for_coins(lianad, 3)
     coin_c = get_coin(lianad, txid)
     c_spend_tx = spend_coins(lianad, bitcoind, [coin_c])
     bitcoind.generate_block(1, wait_for_mempool=1)
@@ -91,7 +91,7 @@ def test_reorg_exclusion(lianad, bitcoind):
     # And if we now confirm everything, they'll be marked as such. The one that was 'spending'
     # will now be spent (its spending transaction will be confirmed) and the one that was spent
     # will be marked as such.
-    deposit_txids = [c["outpoint"][:-2] for c in (coin_a, coin_b, coin_c)]
+    deposit_txids = [c["outpoint"].rsplit(":", 1)[0] for c in (coin_a, coin_b, coin_c)]
     for txid in deposit_txids:
         tx = bitcoind.rpc.gettransaction(txid)["hex"]
         bitcoind.rpc.sendrawtransaction(tx)
@@ -148,7 +148,7 @@ def test_reorg_status_recovery(lianad, bitcoind):
     wait_for(lambda: lianad.rpc.getinfo()["block_height"] == initial_height)
 
     # Both coins are confirmed. Spend the second one then get their infos.
-    wait_for(lambda: len(list_coins()) == 2)
+    wait_for_coins(lianad, 2)
     wait_for(lambda: all(c["block_height"] is not None for c in list_coins()))
     coin_b = get_coin(lianad, txids[1])
     spend_coins(lianad, bitcoind, [coin_b])
@@ -200,7 +200,7 @@ def test_rescan_edge_cases(lianad, bitcoind):
         amount = 0.356
         txid = bitcoind.rpc.sendtoaddress(addr, amount)
         txs.append(bitcoind.rpc.gettransaction(txid)["hex"])
-    wait_for(lambda: len(list_coins()) == 3)
+    wait_for_coins(lianad, 3)
     txs.append(spend_coins(lianad, bitcoind, list_coins()[:2]))
     bitcoind.generate_block(1, wait_for_mempool=4)
     wait_synced()
@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 
 from decimal import Decimal
 from ephemeral_port_reserve import reserve
@@ -12,16 +13,27 @@ class BitcoindRpcInterface:
         self.cookie_path = os.path.join(data_dir, network, ".cookie")
         self.rpc_port = rpc_port
         self.wallet_name = wallet
+        # The HTTP connection to bitcoind is kept alive across calls. It is not
+        # thread safe, so each thread gets its own.
+        self._local = threading.local()
+
+    def _proxy(self):
+        """Get this thread's proxy, creating a new one if the cookie changed (for
+        instance after a restart of bitcoind)."""
+        with open(self.cookie_path) as fd:
+            authpair = fd.read()
+        if getattr(self._local, "authpair", None) != authpair:
+            service_url = f"http://{authpair}@localhost:{self.rpc_port}"
+            if self.wallet_name is not None:
+                service_url += f"/wallet/{self.wallet_name}"
+            self._local.proxy = AuthServiceProxy(service_url)
+            self._local.authpair = authpair
+        return self._local.proxy
 
     def __getattr__(self, name):
         assert not (name.startswith("__") and name.endswith("__")), "Python internals"
 
-        with open(self.cookie_path) as fd:
-            authpair = fd.read()
-        service_url = f"http://{authpair}@localhost:{self.rpc_port}"
-        if self.wallet_name is not None:
-            service_url += f"/wallet/{self.wallet_name}"
-        proxy = AuthServiceProxy(service_url, name)
+        proxy = getattr(self._proxy(), name)
 
         def f(*args):
             return proxy.__call__(*args)
@@ -96,18 +108,14 @@ class Bitcoind(TailableProc):
             if isinstance(wait_for_mempool, str):
                 wait_for_mempool = [wait_for_mempool]
             if isinstance(wait_for_mempool, list):
-                wait_for(
-                    lambda: all(
-                        txid in self.rpc.getrawmempool() for txid in wait_for_mempool
-                    )
-                )
+                txids = set(wait_for_mempool)
+                wait_for(lambda: txids.issubset(self.rpc.getrawmempool()))
             else:
                 wait_for(lambda: len(self.rpc.getrawmempool()) >= wait_for_mempool)
 
-        old_blockcount = self.rpc.getblockcount()
+        # The blocks are connected by the time 'generatetoaddress' returns.
         addr = self.rpc.getnewaddress()
-        self.rpc.generatetoaddress(numblocks, addr)
-        wait_for(lambda: self.rpc.getblockcount() == old_blockcount + numblocks)
+        return self.rpc.generatetoaddress(numblocks, addr)
 
     def get_coins(self, amount_btc):
         # subsidy halving is every 150 blocks on regtest, it's a rough estimate
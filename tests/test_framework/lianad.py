@@ -15,6 +15,7 @@ from test_framework.utils import (
 )
 from test_framework.serializations import (
     PSBT,
+    bip143_tx_hashes,
     sighash_all_witness,
     CTxInWitness,
     CScriptWitness,
@@ -79,7 +80,8 @@ class Lianad(TailableProc):
         # Which key to sign the transaction with.
         hd = self.recovery_hd if recovery else self.owner_hd
 
-        # Sign each input.
+        # Sign each input. The transaction-wide parts of the sighash are the same for all.
+        tx_hashes = bip143_tx_hashes(psbt.tx)
         for i, psbt_in in enumerate(psbt.i):
             # First, gather the needed information from the PSBT input.
             # 'hd_keypaths' is of the form {pubkey: (fingerprint (4 bytes), derivation path (n * 4 bytes))}
@@ -92,7 +94,7 @@ class Lianad(TailableProc):
             script_code = psbt_in.map[PSBT_IN_WITNESS_SCRIPT]
 
             # Now sign the transaction.
-            sighash = sighash_all_witness(script_code, psbt, i)
+            sighash = sighash_all_witness(script_code, psbt, i, tx_hashes=tx_hashes)
             privkey = coincurve.PrivateKey(hd.get_privkey_from_path(der_path))
             pubkey = privkey.public_key.format()
             assert pubkey in psbt_in.map[PSBT_IN_BIP32_DERIVATION].keys(), (
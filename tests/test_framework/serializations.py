@@ -21,7 +21,7 @@ CTransaction,CTxIn, CTxOut, etc....:
 ser_*, deser_*: functions that handle serialization/deserialization
 """
 
-from io import BytesIO
+from io import BytesIO, SEEK_CUR
 from codecs import encode
 import struct
 import binascii
@@ -548,7 +548,8 @@ class CTransaction(object):
 
         if self.sha256 is None:
             self.sha256 = uint256_from_str(hash256(self.serialize_without_witness()))
-        self.hash = encode(hash256(self.serialize())[::-1], "hex_codec").decode("ascii")
+        # Don't serialize and hash the transaction a second time, reuse the txid.
+        self.hash = encode(ser_uint256(self.sha256)[::-1], "hex_codec").decode("ascii")
 
     def txid(self):
         if self.sha256 is None:
@@ -654,7 +655,9 @@ class PSBTMap:
         self.map = m
 
     def serialize(self):
-        m = b""
+        # Gather the parts and join them once, as values (such as a previous
+        # transaction) may be large.
+        m = []
         for key_type in sorted(self.map):
             psbt_val = self.map[key_type]
             if isinstance(key_type, int) and 0 <= key_type and key_type <= 255:
@@ -662,13 +665,13 @@ class PSBTMap:
             if isinstance(psbt_val, dict):
                 for key_data, val_data in psbt_val.items():
                     k = key_type + key_data
-                    m += ser_compact_size(len(k)) + k
-                    m += ser_compact_size(len(val_data)) + val_data
+                    m += [ser_compact_size(len(k)), k]
+                    m += [ser_compact_size(len(val_data)), val_data]
             else:
-                m += ser_compact_size(len(key_type)) + key_type
-                m += ser_compact_size(len(psbt_val)) + psbt_val
-        m += b"\x00"
-        return m
+                m += [ser_compact_size(len(key_type)), key_type]
+                m += [ser_compact_size(len(psbt_val)), psbt_val]
+        m.append(b"\x00")
+        return b"".join(m)
 
 
 class PSBT:
@@ -694,13 +697,25 @@ class PSBT:
         assert isinstance(self.i, list) and all(isinstance(x, PSBTMap) for x in self.i)
         assert isinstance(self.o, list) and all(isinstance(x, PSBTMap) for x in self.o)
         assert 0 in self.g.map
-        tx = from_binary(CTransaction, self.g.map[0])
-        assert len(tx.vin) == len(self.i)
-        assert len(tx.vout) == len(self.o)
+        n_inputs, n_outputs = self._unsigned_tx_io_counts()
+        assert n_inputs == len(self.i)
+        assert n_outputs == len(self.o)
 
         psbt = [x.serialize() for x in [self.g] + self.i + self.o]
         return b"psbt\xff" + b"".join(psbt)
 
+    def _unsigned_tx_io_counts(self):
+        """Get the number of inputs and outputs of the global unsigned transaction,
+        without deserializing it entirely."""
+        f = BytesIO(self.g.map[0])
+        f.seek(4, SEEK_CUR)  # nVersion
+        n_inputs = deser_compact_size(f)
+        for _ in range(n_inputs):
+            f.seek(36, SEEK_CUR)  # prevout
+            f.seek(deser_compact_size(f), SEEK_CUR)  # scriptSig
+            f.seek(4, SEEK_CUR)  # nSequence
+        return n_inputs, deser_compact_size(f)
+
     def make_blank(self):
         """
         Remove all fields except for PSBT_GLOBAL_UNSIGNED_TX
@@ -719,31 +734,38 @@ class PSBT:
 
 
 # Sighash serializations
-def sighash_all_witness(script_code, psbt, i, acp=False):
+def bip143_tx_hashes(tx):
+    """
+    Compute the hashPrevouts, hashSequence and hashOutputs of {tx} as defined in BIP143.
+
+    They are common to all the inputs signed with SIGHASH_ALL, so they can be computed
+    once per transaction and passed to sighash_all_witness for each input.
+    """
+    prevouts_preimage = b"".join(txin.prevout.serialize() for txin in tx.vin)
+    sequence_preimage = b"".join(struct.pack("<I", txin.nSequence) for txin in tx.vin)
+    outputs_preimage = b"".join(txout.serialize() for txout in tx.vout)
+    return (
+        hash256(prevouts_preimage),
+        hash256(sequence_preimage),
+        hash256(outputs_preimage),
+    )
+
+
+def sighash_all_witness(script_code, psbt, i, acp=False, tx_hashes=None):
     """
     Compute the ALL signature hash of the {psbt} 's input {i}.
 
     :param acp: if True, use ALL | ANYONECANPAY behaviour.
+    :param tx_hashes: the result of bip143_tx_hashes for the PSBT's transaction, if
+                      already computed.
     """
-    # Calculate hashPrevouts and hashSequence
-    if not acp:
-        prevouts_preimage = b""
-        sequence_preimage = b""
-        for inputs in psbt.tx.vin:
-            prevouts_preimage += inputs.prevout.serialize()
-            sequence_preimage += struct.pack("<I", inputs.nSequence)
-        hashPrevouts = hash256(prevouts_preimage)
-        hashSequence = hash256(sequence_preimage)
-    else:
+    if tx_hashes is None:
+        tx_hashes = bip143_tx_hashes(psbt.tx)
+    hashPrevouts, hashSequence, hashOutputs = tx_hashes
+    if acp:
         hashPrevouts = b"\x00" * 32
         hashSequence = b"\x00" * 32
 
-    # Calculate hashOutputs
-    outputs_preimage = b""
-    for output in psbt.tx.vout:
-        outputs_preimage += output.serialize()
-    hashOutputs = hash256(outputs_preimage)
-
     sighash_type = b"\x01\x00\x00\x00" if not acp else b"\x81\x00\x00\x00"
 
     # Make sighash preimage
@@ -1,3 +1,4 @@
+import codecs
 import itertools
 import json
 import logging
@@ -27,22 +28,24 @@ BITCOIND_PATH = os.getenv("BITCOIND_PATH", DEFAULT_BITCOIND_PATH)
 COIN = 10 ** 8
 
 
-def wait_for(success, timeout=TIMEOUT, debug_fn=None):
+def wait_for(success, timeout=TIMEOUT, debug_fn=None, poll=0.05):
     """
     Run success() either until it returns True, or until the timeout is reached.
     debug_fn is logged at each call to success, it can be useful for debugging
     when tests fail.
+    poll is the initial interval between two calls to success, in seconds. It
+    is doubled after each unsuccessful call (up to 5 seconds).
     """
-    start_time = time.time()
-    interval = 0.25
-    while not success() and time.time() < start_time + timeout:
+    start_time = time.monotonic()
+    interval = poll
+    while not success() and time.monotonic() < start_time + timeout:
         if debug_fn is not None:
             logging.info(debug_fn())
         time.sleep(interval)
         interval *= 2
         if interval > 5:
             interval = 5
-    if time.time() > start_time + timeout:
+    if time.monotonic() > start_time + timeout:
         raise ValueError("Error waiting for {}", success)
 
 
@@ -83,6 +86,61 @@ def sign_and_broadcast(lianad, bitcoind, psbt, recovery=False):
     return bitcoind.rpc.sendrawtransaction(tx)
 
 
+def waitfor_timeout_ms(timeout):
+    """Convert a timeout in seconds to the milliseconds expected by lianad's 'waitfor*'
+    commands. These read 0 as no timeout, so never go below 100ms."""
+    return max(int(timeout * 1000), 100)
+
+
+def wait_for_coins(lianad, count, timeout=TIMEOUT - 1):
+    """Wait for lianad to know of exactly this number of coins, and return them.
+
+    This blocks on lianad's side until the poller updated its state rather than
+    polling 'listcoins'. The timeout is in seconds, and is kept below the socket's.
+    """
+    coins = lianad.rpc.waitforcoins(count, waitfor_timeout_ms(timeout))["coins"]
+    assert len(coins) == count, f"Expected {count} coins, got {len(coins)}"
+    return coins
+
+
+def wait_for_block_height(lianad, height, timeout=TIMEOUT - 1):
+    """Wait for lianad to be synced up to at least this block height.
+
+    Like wait_for_coins, this blocks on lianad's side. The timeout is in seconds, and
+    is kept below the socket's.
+    """
+    res = lianad.rpc.waitforblockheight(height, waitfor_timeout_ms(timeout))
+    assert (
+        res["block_height"] >= height
+    ), f"Expected block height {height}, got {res['block_height']}"
+    return res["block_height"]
+
+
+def sign_and_broadcast_spend(lianad, psbt):
+    """Sign a Spend PSBT, store it in lianad and have lianad broadcast the transaction.
+
+    :returns: the txid of the Spend transaction.
+    """
+    txid = psbt.tx.txid().hex()
+    signed_psbt = lianad.sign_psbt(psbt)
+    lianad.rpc.batch(
+        [("updatespend", [signed_psbt.to_base64()]), ("broadcastspend", [txid])]
+    )
+    return txid
+
+
+def confirm_spend(lianad, bitcoind, psbt):
+    """Sign and broadcast a Spend PSBT through lianad, then confirm the transaction
+    and wait for lianad to process the block.
+
+    :returns: the txid of the Spend transaction.
+    """
+    txid = sign_and_broadcast_spend(lianad, psbt)
+    bitcoind.generate_block(1, wait_for_mempool=txid)
+    wait_for_block_height(lianad, bitcoind.rpc.getblockcount())
+    return txid
+
+
 class RpcError(ValueError):
     def __init__(self, method: str, params: dict, error: str):
         super(ValueError, self).__init__(
@@ -226,6 +284,62 @@ class UnixDomainSocketRpc(object):
             )
         sock.close()
 
+        return self._result(method, params, resp)
+
+    def batch(self, calls):
+        """Send multiple requests at once, through a single connection.
+
+        :param calls: a list of (method, params) tuples.
+        :returns: the list of results, in the same order as the calls.
+        """
+        self.logger.debug(f"Calling batch {calls}")
+
+        sock = UnixSocket(self.socket_path)
+        msg = b"".join(
+            json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": method,
+                    "params": params,
+                }
+            ).encode()
+            + b"\n"
+            for i, (method, params) in enumerate(calls)
+        )
+        sock.sendall(msg)
+
+        # lianad treats the requests in order and doesn't delimit the responses, so
+        # decode them one after the other from the stream.
+        decoder = json.JSONDecoder()
+        utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        data = ""
+        resps = []
+        while len(resps) < len(calls):
+            chunk = sock.recv(2048)
+            if len(chunk) == 0:
+                raise ValueError(f"Connection closed after {len(resps)} responses.")
+            data += utf8_decoder.decode(chunk)
+            while True:
+                data = data.lstrip()
+                try:
+                    resp, end = decoder.raw_decode(data)
+                except json.JSONDecodeError:
+                    break
+                resps.append(resp)
+                data = data[end:]
+        sock.close()
+
+        self.logger.debug(f"Received responses for batch call: {resps}")
+        results = []
+        for i, ((method, params), resp) in enumerate(zip(calls, resps)):
+            if isinstance(resp, dict) and "id" in resp and resp["id"] != i:
+                raise ValueError(f"Malformed response, id is not {i}: {resp}.")
+            results.append(self._result(method, params, resp))
+        return results
+
+    def _result(self, method, params, resp):
+        """Get the result from a response, raising if it's an error."""
         if not isinstance(resp, dict):
             raise ValueError(
                 f"Malformed response, response is not a dictionary: {resp}"
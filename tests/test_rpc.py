@@ -15,6 +15,10 @@ from test_framework.utils import (
     get_txid,
     spend_coins,
     sign_and_broadcast,
+    sign_and_broadcast_spend,
+    wait_for_coins,
+    waitfor_timeout_ms,
+    TIMEOUT,
 )
 
 
@@ -29,6 +33,44 @@ def test_getinfo(lianad):
     assert res["rescan_progress"] is None
 
 
+def test_waitforblockheight(lianad, bitcoind):
+    # Don't leave lianad waiting forever if the test fails.
+    timeout = waitfor_timeout_ms(TIMEOUT - 1)
+
+    # It returns immediately if we are already synced at this height.
+    height = bitcoind.rpc.getblockcount()
+    wait_for(lambda: lianad.rpc.getinfo()["block_height"] == height)
+    assert lianad.rpc.waitforblockheight(height, timeout)["block_height"] == height
+
+    # It returns once we processed a new block.
+    bitcoind.generate_block(1)
+    res = lianad.rpc.waitforblockheight(height + 1, timeout)
+    assert res["block_height"] == height + 1
+    assert lianad.rpc.getinfo()["block_height"] == height + 1
+
+    # Or if we time out waiting for it.
+    res = lianad.rpc.waitforblockheight(height + 10, 100)
+    assert res["block_height"] == height + 1
+
+
+def test_waitforcoins(lianad, bitcoind):
+    # Don't leave lianad waiting forever if the test fails.
+    timeout = waitfor_timeout_ms(TIMEOUT - 1)
+
+    # It returns immediately if we already have enough coins.
+    assert lianad.rpc.waitforcoins(0, timeout)["coins"] == []
+
+    # It returns once we noticed a new deposit.
+    addr = lianad.rpc.getnewaddress()["address"]
+    txid = bitcoind.rpc.sendtoaddress(addr, 0.01)
+    coins = lianad.rpc.waitforcoins(1, timeout)["coins"]
+    assert len(coins) == 1
+    assert coins[0]["outpoint"].startswith(txid)
+
+    # Or if we time out waiting for one.
+    assert len(lianad.rpc.waitforcoins(2, 100)["coins"]) == 1
+
+
 def test_getaddress(lianad):
     res = lianad.rpc.getnewaddress()
     assert "address" in res
@@ -36,6 +78,16 @@ def test_getaddress(lianad):
     assert res["address"] != lianad.rpc.getnewaddress()["address"]
 
 
+def test_getaddresses(lianad):
+    addrs = lianad.rpc.getnewaddresses(3)["addresses"]
+    assert len(set(addrs)) == 3
+    # They are new ones, too
+    assert lianad.rpc.getnewaddress()["address"] not in addrs
+    assert lianad.rpc.getnewaddresses(0)["addresses"] == []
+    with pytest.raises(RpcError, match="Invalid 'count' parameter."):
+        lianad.rpc.getnewaddresses(1_001)
+
+
 def test_listcoins(lianad, bitcoind):
     # Initially empty
     res = lianad.rpc.listcoins()
@@ -46,7 +98,7 @@ def test_listcoins(lianad, bitcoind):
     # funds as well.
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 1)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
+    wait_for_coins(lianad, 1)
     res = lianad.rpc.listcoins()["coins"]
     assert txid == res[0]["outpoint"][:64]
     assert res[0]["amount"] == 1 * COIN
@@ -79,7 +131,7 @@ def test_jsonrpc_server(lianad, bitcoind):
     """Test passing parameters as a list or a mapping."""
     addr = lianad.rpc.getnewaddress()["address"]
     bitcoind.rpc.sendtoaddress(addr, 1)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
+    wait_for_coins(lianad, 1)
     outpoints = [lianad.rpc.listcoins()["coins"][0]["outpoint"]]
     destinations = {
         bitcoind.rpc.getnewaddress(): 20_000,
@@ -101,7 +153,7 @@ def test_create_spend(lianad, bitcoind):
         bitcoind.generate_block(1, wait_for_mempool=txid)
     txid = bitcoind.rpc.sendtoaddress(addr, 0.3556)
     bitcoind.generate_block(1, wait_for_mempool=txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 16)
+    wait_for_coins(lianad, 16)
 
     # Stop the daemon, should be a no-op
     lianad.stop()
@@ -139,8 +191,7 @@ def test_list_spend(lianad, bitcoind):
     addr = lianad.rpc.getnewaddress()["address"]
     value_a = 0.2567
     bitcoind.rpc.sendtoaddress(addr, value_a)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
-    outpoints = [c["outpoint"] for c in lianad.rpc.listcoins()["coins"]]
+    outpoints = [c["outpoint"] for c in wait_for_coins(lianad, 1)]
     destinations = {
         bitcoind.rpc.getnewaddress(): int(value_a * COIN // 2),
     }
@@ -150,7 +201,7 @@ def test_list_spend(lianad, bitcoind):
     addr = lianad.rpc.getnewaddress()["address"]
     value_b = 0.0987
     bitcoind.rpc.sendtoaddress(addr, value_b)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 2)
+    wait_for_coins(lianad, 2)
     outpoints = [c["outpoint"] for c in lianad.rpc.listcoins()["coins"]]
     destinations = {
         bitcoind.rpc.getnewaddress(): int((value_a + value_b) * COIN - 1_000),
@@ -188,8 +239,7 @@ def test_update_spend(lianad, bitcoind):
     # Start by creating a Spend PSBT
     addr = lianad.rpc.getnewaddress()["address"]
     bitcoind.rpc.sendtoaddress(addr, 0.2567)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) > 0)
-    outpoints = [c["outpoint"] for c in lianad.rpc.listcoins()["coins"]]
+    outpoints = [c["outpoint"] for c in wait_for_coins(lianad, 1)]
     destinations = {
         bitcoind.rpc.getnewaddress(): 200_000,
     }
@@ -245,8 +295,7 @@ def test_broadcast_spend(lianad, bitcoind):
     # Create a new coin and a spending tx for it.
     addr = lianad.rpc.getnewaddress()["address"]
     bitcoind.rpc.sendtoaddress(addr, 0.2567)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) > 0)
-    outpoints = [c["outpoint"] for c in lianad.rpc.listcoins()["coins"]]
+    outpoints = [c["outpoint"] for c in wait_for_coins(lianad, 1)]
     destinations = {
         bitcoind.rpc.getnewaddress(): 200_000,
     }
@@ -313,7 +362,7 @@ def test_start_rescan(lianad, bitcoind):
         amount = random.randint(1, COIN * 10) / COIN
         txid = bitcoind.rpc.sendtoaddress(addr, amount)
         bitcoind.generate_block(random.randint(1, 10), wait_for_mempool=txid)
-    wait_for(lambda: len(list_coins()) == 10)
+    wait_for_coins(lianad, 10)
 
     # Then simulate some regular activity (spend and receive)
     # TODO: instead of having randomness we should lay down all different cases (with or
@@ -370,13 +419,6 @@ def test_start_rescan(lianad, bitcoind):
 def test_listtransactions(lianad, bitcoind):
     """Test listing of transactions by txid and timespan"""
 
-    def sign_and_broadcast(psbt):
-        txid = psbt.tx.txid().hex()
-        psbt = lianad.sign_psbt(psbt)
-        lianad.rpc.updatespend(psbt.to_base64())
-        lianad.rpc.broadcastspend(txid)
-        return txid
-
     def wait_synced():
         wait_for(
             lambda: lianad.rpc.getinfo()["block_height"] == bitcoind.rpc.getblockcount()
@@ -393,7 +435,7 @@ def test_listtransactions(lianad, bitcoind):
         lianad.rpc.getnewaddress()["address"]: 0.0123458,
     }
     txid = bitcoind.rpc.sendmany("", destinations)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 3)
+    wait_for_coins(lianad, 3)
     bitcoind.generate_block(1, wait_for_mempool=txid)
 
     # Mine 12 blocks to force the blocktime to increase
@@ -406,13 +448,13 @@ def test_listtransactions(lianad, bitcoind):
     # Deposit a coin that will be unspent
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 0.123456)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 4)
+    wait_for_coins(lianad, 4)
     bitcoind.generate_block(1, wait_for_mempool=txid)
 
     # Deposit a coin that will be spent with a change output
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 0.23456)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 5)
+    wait_for_coins(lianad, 5)
     bitcoind.generate_block(1, wait_for_mempool=txid)
     outpoint = next(
         c["outpoint"] for c in lianad.rpc.listcoins()["coins"] if txid in c["outpoint"]
@@ -422,7 +464,7 @@ def test_listtransactions(lianad, bitcoind):
     }
     res = lianad.rpc.createspend(destinations, [outpoint], 6)
     psbt = PSBT.from_base64(res["psbt"])
-    txid = sign_and_broadcast(psbt)
+    txid = sign_and_broadcast_spend(lianad, psbt)
     bitcoind.generate_block(1, wait_for_mempool=txid)
 
     # Mine 12 blocks to force the blocktime to increase
@@ -437,7 +479,7 @@ def test_listtransactions(lianad, bitcoind):
     # Deposit a coin that will be spent with a change output and also two new deposits
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 0.3456)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 7)
+    wait_for_coins(lianad, 7)
     bitcoind.generate_block(1, wait_for_mempool=txid)
     outpoint = next(
         c["outpoint"] for c in lianad.rpc.listcoins()["coins"] if txid in c["outpoint"]
@@ -449,13 +491,13 @@ def test_listtransactions(lianad, bitcoind):
     }
     res = lianad.rpc.createspend(destinations, [outpoint], 6)
     psbt = PSBT.from_base64(res["psbt"])
-    txid = sign_and_broadcast(psbt)
+    txid = sign_and_broadcast_spend(lianad, psbt)
     bitcoind.generate_block(1, wait_for_mempool=txid)
 
     # Deposit a coin that will be spending (unconfirmed spend transaction)
     addr = lianad.rpc.getnewaddress()["address"]
     txid = bitcoind.rpc.sendtoaddress(addr, 0.456)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 11)
+    wait_for_coins(lianad, 11)
     bitcoind.generate_block(1, wait_for_mempool=txid)
     outpoint = next(
         c["outpoint"] for c in lianad.rpc.listcoins()["coins"] if txid in c["outpoint"]
@@ -465,15 +507,17 @@ def test_listtransactions(lianad, bitcoind):
     }
     res = lianad.rpc.createspend(destinations, [outpoint], 6)
     psbt = PSBT.from_base64(res["psbt"])
-    txid = sign_and_broadcast(psbt)
+    txid = sign_and_broadcast_spend(lianad, psbt)
 
     # At this point we have 12 spent and unspent coins, one of them is unconfirmed.
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 12)
+    wait_for_coins(lianad, 12)
 
     # However some of them share the same txid! This is the case of the 3 first coins
     # for instance, or the Spend transactions with multiple outputs at one of our addresses.
     # In total, that's 8 transactions.
-    txids = set(c["outpoint"][:-2] for c in lianad.rpc.listcoins()["coins"])
+    txids = set(
+        c["outpoint"].rsplit(":", 1)[0] for c in lianad.rpc.listcoins()["coins"]
+    )
     assert len(txids) == 8
 
     # We can query all of them at once using listtransactions. The result contains all
@@ -485,7 +529,9 @@ def test_listtransactions(lianad, bitcoind):
         txids.remove(txid)  # This will raise an error if it isn't there
 
     # We can also query them one by one.
-    txids = set(c["outpoint"][:-2] for c in lianad.rpc.listcoins()["coins"])
+    txids = set(
+        c["outpoint"].rsplit(":", 1)[0] for c in lianad.rpc.listcoins()["coins"]
+    )
     for txid in txids:
         txs = lianad.rpc.listtransactions([txid])["transactions"]
         bit_txid = bitcoind.rpc.decoderawtransaction(txs[0]["tx"])["txid"]
@@ -525,7 +571,7 @@ def test_listtransactions(lianad, bitcoind):
             and spend_time >= second_timestamp
             and spend_time <= third_timestamp
         ):
-            txids.add(coin["outpoint"][:-2])
+            txids.add(coin["outpoint"].rsplit(":", 1)[0])
     # It's all 7 minus the first deposit and the last confirmed spend. So that's 5 of them.
     assert len(txids) == 3
     # Now let's compare with what lianad is giving us.
@@ -1,22 +1,37 @@
+import pytest
+
 from fixtures import *
 from test_framework.serializations import PSBT
-from test_framework.utils import wait_for, COIN
+from test_framework.utils import (
+    COIN,
+    confirm_spend,
+    sign_and_broadcast_spend,
+    wait_for_block_height,
+    wait_for,
+    wait_for_coins,
+)
+
+
+@pytest.fixture
+def bitcoind(module_bitcoind):
+    """These tests don't need a fresh block chain, share a bitcoind among them."""
+    return module_bitcoind
 
 
 def test_spend_change(lianad, bitcoind):
     """We can spend a coin that was received on a change address."""
-    # Receive a coin on a receive address
-    addr = lianad.rpc.getnewaddress()["address"]
-    txid = bitcoind.rpc.sendtoaddress(addr, 0.01)
-    bitcoind.generate_block(1, wait_for_mempool=txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
+    # Receive a coin on a receive address. No need to confirm it before spending it,
+    # it will be confirmed along with the spend.
+    addrs = lianad.rpc.getnewaddresses(2)["addresses"]
+    bitcoind.rpc.sendtoaddress(addrs.pop(), 0.01)
+    coins = wait_for_coins(lianad, 1)
 
     # Create a transaction that will spend this coin to 1) one of our receive
     # addresses 2) an external address 3) one of our change addresses.
-    outpoints = [c["outpoint"] for c in lianad.rpc.listcoins()["coins"]]
+    outpoints = [c["outpoint"] for c in coins]
     destinations = {
         bitcoind.rpc.getnewaddress(): 100_000,
-        lianad.rpc.getnewaddress()["address"]: 100_000,
+        addrs.pop(): 100_000,
     }
     res = lianad.rpc.createspend(destinations, outpoints, 2)
     assert "psbt" in res
@@ -26,21 +41,14 @@ def test_spend_change(lianad, bitcoind):
     assert len(spend_psbt.o) == 3
     assert len(spend_psbt.tx.vout) == 3
 
-    # Sign and broadcast this first Spend transaction.
-    signed_psbt = lianad.sign_psbt(spend_psbt)
-    lianad.rpc.updatespend(signed_psbt.to_base64())
-    spend_txid = signed_psbt.tx.txid().hex()
-    lianad.rpc.broadcastspend(spend_txid)
-    bitcoind.generate_block(1, wait_for_mempool=spend_txid)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 3)
+    # Sign, broadcast and confirm this first Spend transaction.
+    confirm_spend(lianad, bitcoind, spend_psbt)
+    coins = lianad.rpc.listcoins()["coins"]
+    assert len(coins) == 3
 
     # Now create a new transaction that spends the change output as well as
     # the output sent to the receive address.
-    outpoints = [
-        c["outpoint"]
-        for c in lianad.rpc.listcoins()["coins"]
-        if c["spend_info"] is None
-    ]
+    outpoints = [c["outpoint"] for c in coins if c["spend_info"] is None]
     destinations = {
         bitcoind.rpc.getnewaddress(): 100_000,
     }
@@ -48,118 +56,94 @@ def test_spend_change(lianad, bitcoind):
     spend_psbt = PSBT.from_base64(res["psbt"])
 
     # We can sign and broadcast it.
-    signed_psbt = lianad.sign_psbt(spend_psbt)
-    lianad.rpc.updatespend(signed_psbt.to_base64())
-    spend_txid = signed_psbt.tx.txid().hex()
-    lianad.rpc.broadcastspend(spend_txid)
-    bitcoind.generate_block(1, wait_for_mempool=spend_txid)
+    confirm_spend(lianad, bitcoind, spend_psbt)
 
 
-def test_coin_marked_spent(lianad, bitcoind):
+def test_coin_marked_spent(lianad, bitcoind, executor):
     """Test a spent coin is marked as such under various conditions."""
-    # Receive a coin in a single transaction
-    addr = lianad.rpc.getnewaddress()["address"]
-    deposit_a = bitcoind.rpc.sendtoaddress(addr, 0.01)
-    bitcoind.generate_block(1, wait_for_mempool=deposit_a)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 1)
-
-    # Receive another coin on the same address
-    deposit_b = bitcoind.rpc.sendtoaddress(addr, 0.02)
-    bitcoind.generate_block(1, wait_for_mempool=deposit_b)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 2)
-
-    # Receive three coins in a single deposit transaction
-    destinations = {
-        lianad.rpc.getnewaddress()["address"]: 0.03,
-        lianad.rpc.getnewaddress()["address"]: 0.04,
-        lianad.rpc.getnewaddress()["address"]: 0.05,
-    }
-    deposit_c = bitcoind.rpc.sendmany("", destinations)
-    bitcoind.generate_block(1, wait_for_mempool=deposit_c)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 5)
+    # Receive a coin in a single transaction, another coin on the same address
+    # and three coins in a single deposit transaction. The deposits are
+    # independent so make them concurrently and confirm them in a single block.
+    # Get all the addresses of ours we'll need at once.
+    addrs = lianad.rpc.getnewaddresses(9)["addresses"]
+    addr = addrs.pop()
+    destinations = dict(zip([addrs.pop() for _ in range(3)], [0.03, 0.04, 0.05]))
+    # A duplicated address would silently be dropped from the mapping.
+    assert len(destinations) == 3
+    fut_a = executor.submit(bitcoind.rpc.sendtoaddress, addr, 0.01)
+    fut_b = executor.submit(bitcoind.rpc.sendtoaddress, addr, 0.02)
+    fut_c = executor.submit(bitcoind.rpc.sendmany, "", destinations)
+    deposit_a, deposit_b, deposit_c = (f.result() for f in (fut_a, fut_b, fut_c))
+    bitcoind.generate_block(1, wait_for_mempool=[deposit_a, deposit_b, deposit_c])
+    wait_for_block_height(lianad, bitcoind.rpc.getblockcount())
 
     # Receive a coin in an unconfirmed deposit transaction
-    addr = lianad.rpc.getnewaddress()["address"]
-    deposit_d = bitcoind.rpc.sendtoaddress(addr, 0.06)
-    wait_for(lambda: len(lianad.rpc.listcoins()["coins"]) == 5)
+    deposit_d = bitcoind.rpc.sendtoaddress(addrs.pop(), 0.06)
+    coins = wait_for_coins(lianad, 6)
+
+    # Group the outpoints of our coins by deposit transaction. Their state is
+    # updated as we spend them below but not their outpoints, so query them once.
+    by_deposit = {}
+    for c in coins:
+        txid, _ = c["outpoint"].rsplit(":", 1)
+        by_deposit.setdefault(txid, []).append(c["outpoint"])
 
-    def sign_and_broadcast(psbt):
-        txid = psbt.tx.txid().hex()
-        psbt = lianad.sign_psbt(psbt)
-        lianad.rpc.updatespend(psbt.to_base64())
-        lianad.rpc.broadcastspend(txid)
-        return txid
+    spend_txids = []
 
     # Spend the first coin with a change output
-    outpoint = next(
-        c["outpoint"]
-        for c in lianad.rpc.listcoins()["coins"]
-        if deposit_a in c["outpoint"]
-    )
+    outpoint = by_deposit[deposit_a][0]
     destinations = {
         bitcoind.rpc.getnewaddress(): 500_000,
     }
     res = lianad.rpc.createspend(destinations, [outpoint], 6)
     psbt = PSBT.from_base64(res["psbt"])
-    sign_and_broadcast(psbt)
+    spend_txids.append(sign_and_broadcast_spend(lianad, psbt))
 
     # Spend the second coin without a change output
-    outpoint = next(
-        c["outpoint"]
-        for c in lianad.rpc.listcoins()["coins"]
-        if deposit_b in c["outpoint"]
-    )
+    outpoint = by_deposit[deposit_b][0]
     destinations = {
         bitcoind.rpc.getnewaddress(): int(0.02 * COIN) - 1_000,
     }
     res = lianad.rpc.createspend(destinations, [outpoint], 1)
     psbt = PSBT.from_base64(res["psbt"])
-    sign_and_broadcast(psbt)
+    spend_txids.append(sign_and_broadcast_spend(lianad, psbt))
 
     # Spend the third coin to an address of ours, no change
-    outpoints = [
-        c["outpoint"]
-        for c in lianad.rpc.listcoins()["coins"]
-        if deposit_c in c["outpoint"]
-    ]
+    outpoints = by_deposit[deposit_c]
     destinations = {
-        lianad.rpc.getnewaddress()["address"]: int(0.03 * COIN) - 1_000,
+        addrs.pop(): int(0.03 * COIN) - 1_000,
     }
     res = lianad.rpc.createspend(destinations, [outpoints[0]], 1)
     psbt = PSBT.from_base64(res["psbt"])
-    sign_and_broadcast(psbt)
+    spend_txids.append(sign_and_broadcast_spend(lianad, psbt))
 
     # Spend the fourth coin to an address of ours, with change
     destinations = {
-        lianad.rpc.getnewaddress()["address"]: int(0.04 * COIN / 2),
+        addrs.pop(): int(0.04 * COIN / 2),
     }
     res = lianad.rpc.createspend(destinations, [outpoints[1]], 18)
     psbt = PSBT.from_base64(res["psbt"])
-    sign_and_broadcast(psbt)
+    spend_txids.append(sign_and_broadcast_spend(lianad, psbt))
 
     # Batch spend the fourth and fifth coins
-    outpoint = next(
-        c["outpoint"]
-        for c in lianad.rpc.listcoins()["coins"]
-        if deposit_d in c["outpoint"]
+    outpoint = by_deposit[deposit_d][0]
+    ext_addr = bitcoind.rpc.getnewaddress()
+    destinations = dict(
+        zip([addrs.pop(), addrs.pop(), ext_addr], [int(0.01 * COIN)] * 3)
     )
-    destinations = {
-        lianad.rpc.getnewaddress()["address"]: int(0.01 * COIN),
-        lianad.rpc.getnewaddress()["address"]: int(0.01 * COIN),
-        bitcoind.rpc.getnewaddress(): int(0.01 * COIN),
-    }
+    assert len(destinations) == 3
     res = lianad.rpc.createspend(destinations, [outpoints[2], outpoint], 2)
     psbt = PSBT.from_base64(res["psbt"])
-    sign_and_broadcast(psbt)
+    spend_txids.append(sign_and_broadcast_spend(lianad, psbt))
 
     # All the spent coins must have been detected as such
-    all_deposits = (deposit_a, deposit_b, deposit_c, deposit_d)
+    all_deposits = {deposit_a, deposit_b, deposit_c, deposit_d}
 
     def deposited_coins():
         return (
             c
             for c in lianad.rpc.listcoins()["coins"]
-            if c["outpoint"][:-2] in all_deposits
+            if c["outpoint"].rsplit(":", 1)[0] in all_deposits
         )
 
     def is_spent(coin):
@@ -169,4 +153,16 @@ def test_coin_marked_spent(lianad, bitcoind):
             return False
         return True
 
+    # The spends are unconfirmed, lianad must notice them in the mempool.
     wait_for(lambda: all(is_spent(c) for c in deposited_coins()))
+
+    # The spends were all accepted to bitcoind's mempool upon broadcast. Confirm them in
+    # a single block and check the result after lianad processed it.
+    block_hash = bitcoind.generate_block(1)[0]
+    block = bitcoind.rpc.getblock(block_hash)
+    assert set(spend_txids).issubset(block["tx"])
+    wait_for_block_height(lianad, block["height"])
+    assert all(
+        is_spent(c) and c["spend_info"]["height"] == block["height"]
+        for c in deposited_coins()
+    )